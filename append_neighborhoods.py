@@ -1,12 +1,19 @@
 import pandas as pd
 
-# Read your CSV
-df = pd.read_csv("nyc_restaurant_week.csv")
+from instrumentation import PipelineRun
 
-# Append ", NYC" to Neighborhood column
-df["Neighborhood"] = df["Neighborhood"].astype(str) + ", New York, NY"
+with PipelineRun('append_neighborhoods') as run:
+    # Read your CSV
+    with run.span('read csv'):
+        df = pd.read_csv("nyc_restaurant_week.csv")
 
-# Save to a new file (safer than overwriting)
-df.to_csv("nyc_restaurants_nyc.csv", index=False)
+    # Append ", NYC" to Neighborhood column
+    with run.span('append suffix'):
+        df["Neighborhood"] = df["Neighborhood"].astype(str) + ", New York, NY"
+    run.count('rows processed', len(df))
 
-print("Done! ', New York, NY' appended to Neighborhood column.")
+    # Save to a new file (safer than overwriting)
+    with run.span('write csv'):
+        df.to_csv("nyc_restaurants_nyc.csv", index=False)
+
+    print("Done! ', New York, NY' appended to Neighborhood column.")
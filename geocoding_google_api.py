@@ -1,18 +1,20 @@
 import pandas as pd
-import requests
 import time
 
+from instrumentation import PipelineRun
+from http_client import ApiClient
+
 API_KEY = "<API key>"
 
 GEOCODE_URL = "https://maps.googleapis.com/maps/api/geocode/json"
 
-def geocode_address(address):
+def geocode_address(address, client):
     params = {
         "address": address,
         "key": API_KEY
     }
 
-    response = requests.get(GEOCODE_URL, params=params).json()
+    response = client.get_json(GEOCODE_URL, params=params, metric='geocoding api')
 
     if response["status"] == "OK":
         result = response["results"][0]
@@ -21,27 +23,35 @@ def geocode_address(address):
     else:
         return None, None
 
-# Load CSV
-df = pd.read_csv("restaurants_with_addresses.csv")
+if __name__ == "__main__":
+    with PipelineRun('geocoding') as run:
+        # Load CSV
+        with run.span('read csv'):
+            df = pd.read_csv("restaurants_with_addresses.csv")
 
-latitudes = []
-longitudes = []
+        latitudes = []
+        longitudes = []
 
-for i, address in enumerate(df["Address"], start=1):
-    lat, lng = geocode_address(address)
-    latitudes.append(lat)
-    longitudes.append(lng)
+        with run.span('geocoding lookups'), ApiClient(run=run) as client:
+            for i, address in enumerate(df["Address"], start=1):
+                lat, lng = geocode_address(address, client)
+                latitudes.append(lat)
+                longitudes.append(lng)
+                run.count('rows processed')
 
-    if lat is None:
-        print(f"⚠️ Failed to geocode: {address}")
+                if lat is None:
+                    run.count('failures')
+                    print(f"⚠️ Failed to geocode: {address}")
 
-    # Respect rate limits
-    time.sleep(0.1)
+                # Respect rate limits
+                with run.span('rate limit sleep'):
+                    time.sleep(0.1)
 
-df["Latitude"] = latitudes
-df["Longitude"] = longitudes
+        df["Latitude"] = latitudes
+        df["Longitude"] = longitudes
 
-# Save output
-df.to_csv("restaurants_geocoded.csv", index=False)
+        # Save output
+        with run.span('write csv'):
+            df.to_csv("restaurants_geocoded.csv", index=False)
 
-print("✅ Geocoding complete.")
+        print("✅ Geocoding complete.")
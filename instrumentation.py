@@ -0,0 +1,167 @@
+# Pipeline timing and instrumentation
+# ===================================
+# Shared by all the pipeline scripts so a slow run can be pinned on a stage (network, Selenium
+# waits, pandas, writing the map) instead of guessed at from the progress banners.
+#
+# Usage:
+#     with PipelineRun('places') as run:
+#         with run.span('read csv'):
+#             df = pd.read_csv(...)
+#         with run.timed('places api'):
+#             response = requests.get(...)
+#         run.count('rows processed')
+#
+# Each run prints a timing table at the end and writes a JSON summary to run_summaries/.
+# Set PIPELINE_PROFILE=1 to also capture a cProfile dump next to the summary.
+
+import cProfile
+import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# Upper edges (ms) of the latency histogram buckets; anything slower lands in the last one
+LATENCY_BUCKETS_MS = [10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    rank = min(len(sorted_values) - 1, max(0, round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[rank]
+
+
+class PipelineRun:
+    """
+    Collects named spans, latency histograms and counters for one run of a pipeline script.
+    """
+
+    def __init__(self, name, output_dir='run_summaries', profile=None):
+        self.name = name
+        self.output_dir = output_dir
+        if profile is None:
+            profile = os.environ.get('PIPELINE_PROFILE', '') not in ('', '0')
+        self.profiler = cProfile.Profile() if profile else None
+
+        self.started_at = datetime.now()
+        self._start = time.perf_counter()
+        self.spans = {}       # name -> {'calls': n, 'seconds': total}
+        self.latencies = {}   # name -> [ms, ...]
+        self.counters = {}    # name -> n
+        self.extra = {}
+
+    def __enter__(self):
+        if self.profiler:
+            self.profiler.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.finish(status='ok' if exc_type is None else f'error: {exc_type.__name__}')
+        return False
+
+    @contextmanager
+    def span(self, name):
+        """
+        Time a named stage. Repeated spans with the same name are summed.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry = self.spans.setdefault(name, {'calls': 0, 'seconds': 0.0})
+            entry['calls'] += 1
+            entry['seconds'] += time.perf_counter() - start
+
+    @contextmanager
+    def timed(self, name):
+        """
+        Record the latency of one request (or any short operation) into the named histogram.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, (time.perf_counter() - start) * 1000)
+
+    def observe(self, name, ms):
+        self.latencies.setdefault(name, []).append(ms)
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def note(self, name, value):
+        """
+        Attach an extra JSON-friendly value (e.g. an input file name) to the summary.
+        """
+        self.extra[name] = value
+
+    def _histograms(self):
+        histograms = {}
+        for name, values in self.latencies.items():
+            ordered = sorted(values)
+            buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+            for ms in ordered:
+                slot = next((i for i, edge in enumerate(LATENCY_BUCKETS_MS) if ms <= edge), len(LATENCY_BUCKETS_MS))
+                buckets[slot] += 1
+            histograms[name] = {
+                'count': len(ordered),
+                'mean_ms': round(sum(ordered) / len(ordered), 2),
+                'p50_ms': round(_percentile(ordered, 50), 2),
+                'p90_ms': round(_percentile(ordered, 90), 2),
+                'p99_ms': round(_percentile(ordered, 99), 2),
+                'max_ms': round(ordered[-1], 2),
+                'buckets': {
+                    **{f"<={edge}ms": n for edge, n in zip(LATENCY_BUCKETS_MS, buckets)},
+                    f">{LATENCY_BUCKETS_MS[-1]}ms": buckets[-1],
+                },
+            }
+        return histograms
+
+    def summary(self, status='ok'):
+        return {
+            'script': self.name,
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'status': status,
+            'total_seconds': round(time.perf_counter() - self._start, 3),
+            'spans': {name: {'calls': e['calls'], 'seconds': round(e['seconds'], 3)} for name, e in self.spans.items()},
+            'latency': self._histograms(),
+            'counters': dict(self.counters),
+            **({'extra': self.extra} if self.extra else {}),
+        }
+
+    def finish(self, status='ok'):
+        """
+        Print the timing table and write the JSON summary (plus the cProfile dump if enabled).
+        Returns the summary file path.
+        """
+        if self.profiler:
+            self.profiler.disable()
+
+        summary = self.summary(status)
+        os.makedirs(self.output_dir, exist_ok=True)
+        stamp = self.started_at.strftime('%Y%m%d-%H%M%S')
+        summary_file = os.path.join(self.output_dir, f"{self.name}_{stamp}.json")
+        with open(summary_file, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+
+        if self.profiler:
+            profile_file = os.path.join(self.output_dir, f"{self.name}_{stamp}.prof")
+            self.profiler.dump_stats(profile_file)
+
+        print("\n" + "=" * 80)
+        print(f"Timings ({self.name}) - {summary['total_seconds']:.2f}s total")
+        print("=" * 80)
+        for name, entry in summary['spans'].items():
+            calls = f" ({entry['calls']} calls)" if entry['calls'] > 1 else ""
+            print(f"  {name}: {entry['seconds']:.2f}s{calls}")
+        for name, hist in summary['latency'].items():
+            print(f"  {name}: {hist['count']} requests, p50 {hist['p50_ms']:.0f}ms, "
+                  f"p90 {hist['p90_ms']:.0f}ms, max {hist['max_ms']:.0f}ms")
+        for name, n in summary['counters'].items():
+            print(f"  {name}: {n}")
+        print(f"✓ Run summary saved to: {summary_file}")
+        if self.profiler:
+            print(f"✓ Profile saved to: {profile_file}")
+
+        return summary_file
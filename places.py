@@ -1,29 +1,48 @@
 import pandas as pd
-import requests
 import time
 
+from instrumentation import PipelineRun
+from http_client import ApiClient
+
 API_KEY = "<API key>"
 
-def get_address(restaurant, neighborhood):
+PLACES_URL = "https://maps.googleapis.com/maps/api/place/textsearch/json"
+
+def search_place(restaurant, neighborhood, client):
+    # Top Places text-search result for the restaurant, or None
     query = f"{restaurant}, {neighborhood}"
-    url = "https://maps.googleapis.com/maps/api/place/textsearch/json"
     params = {
         "query": query,
         "key": API_KEY
     }
 
-    response = requests.get(url, params=params).json()
+    response = client.get_json(PLACES_URL, params=params, metric='places api')
     if response["results"]:
-        return response["results"][0]["formatted_address"]
+        return response["results"][0]
+    return None
+
+def get_address(restaurant, neighborhood, client):
+    place = search_place(restaurant, neighborhood, client)
+    if place:
+        return place["formatted_address"]
     return None
 
-df = pd.read_csv("nyc_restaurants_nyc.csv")
+if __name__ == "__main__":
+    with PipelineRun('places') as run:
+        with run.span('read csv'):
+            df = pd.read_csv("nyc_restaurants_nyc.csv")
 
-addresses = []
-for _, row in df.iterrows():
-    address = get_address(row["Restaurant"], row["Neighborhood"])
-    addresses.append(address)
-    time.sleep(0.1)  # be nice to the API
+        addresses = []
+        with run.span('places lookups'), ApiClient(run=run) as client:
+            for _, row in df.iterrows():
+                address = get_address(row["Restaurant"], row["Neighborhood"], client)
+                addresses.append(address)
+                run.count('rows processed')
+                if address is None:
+                    run.count('failures')
+                with run.span('rate limit sleep'):
+                    time.sleep(0.1)  # be nice to the API
 
-df["Address"] = addresses
-df.to_csv("restaurants_with_addresses.csv", index=False)
+        with run.span('write csv'):
+            df["Address"] = addresses
+            df.to_csv("restaurants_with_addresses.csv", index=False)
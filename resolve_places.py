@@ -0,0 +1,71 @@
+# Combined address + coordinates lookup
+# =====================================
+# Replaces running places.py and then geocoding_google_api.py. The Places text-search response
+# already includes each restaurant's coordinates (geometry.location) and place id alongside its
+# formatted_address, so one call per restaurant is enough. The Geocoding API is only called as a
+# fallback when a Places result comes back without coordinates.
+#
+# Reads nyc_restaurants_nyc.csv and writes restaurants_geocoded.csv (with an extra Place ID column).
+
+import pandas as pd
+import time
+
+from instrumentation import PipelineRun
+from http_client import ApiClient
+from places import search_place
+from geocoding_google_api import geocode_address
+
+
+def resolve_place(restaurant, neighborhood, client, run=None):
+    """
+    Look up a restaurant's address, coordinates and place id. Returns a dict with Address,
+    Latitude, Longitude and Place ID (any of which may be None).
+    """
+    place = search_place(restaurant, neighborhood, client)
+    if not place:
+        return {'Address': None, 'Latitude': None, 'Longitude': None, 'Place ID': None}
+
+    address = place.get("formatted_address")
+    location = (place.get("geometry") or {}).get("location") or {}
+    lat, lng = location.get("lat"), location.get("lng")
+
+    if (lat is None or lng is None) and address:
+        if run:
+            run.count('geocoding fallbacks')
+        lat, lng = geocode_address(address, client)
+
+    return {'Address': address, 'Latitude': lat, 'Longitude': lng, 'Place ID': place.get("place_id")}
+
+
+def resolve_places(csv_file="nyc_restaurants_nyc.csv", output_file="restaurants_geocoded.csv", run=None):
+    if run is None:
+        with PipelineRun('resolve_places') as run:
+            return resolve_places(csv_file, output_file, run=run)
+
+    with run.span('read csv'):
+        df = pd.read_csv(csv_file)
+
+    resolved = []
+    with run.span('place lookups'), ApiClient(run=run) as client:
+        for _, row in df.iterrows():
+            result = resolve_place(row["Restaurant"], row["Neighborhood"], client, run=run)
+            resolved.append(result)
+            run.count('rows processed')
+
+            if result['Latitude'] is None:
+                run.count('failures')
+                print(f"⚠️ Failed to resolve: {row['Restaurant']}")
+
+            with run.span('rate limit sleep'):
+                time.sleep(0.1)  # be nice to the API
+
+    with run.span('write csv'):
+        df = pd.concat([df, pd.DataFrame(resolved, index=df.index)], axis=1)
+        df.to_csv(output_file, index=False)
+
+    print(f"✅ Resolved {len(df)} restaurants to {output_file}")
+    return output_file
+
+
+if __name__ == "__main__":
+    resolve_places()
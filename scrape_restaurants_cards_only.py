@@ -14,9 +14,16 @@ from webdriver_manager.chrome import ChromeDriverManager
 import csv
 import time
 
-def scrape_restaurant_week():
+from instrumentation import PipelineRun
+
+def scrape_restaurant_week(run=None):
  
-    # Scrape restaurant data directly from listing cards.
+    # Scrape restaurant data directly from listing cards. Timings and counters go to run
+    # (a PipelineRun); a new one is started if none is given.
+    
+    if run is None:
+        with PipelineRun('scrape_restaurants') as run:
+            return scrape_restaurant_week(run=run)
     
     base_url = "https://www.nyctourism.com/restaurant-week/"
     all_restaurants = []
@@ -35,16 +42,18 @@ def scrape_restaurant_week():
     print("\nInitializing browser...")
     
     # Initialize the driver
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
-    driver.maximize_window()
+    with run.span('browser startup'):
+        driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
+        driver.maximize_window()
     
     try:
         page_count = 0
         max_pages = 55
         
         # Start at the main page
-        driver.get(base_url)
-        time.sleep(3)
+        with run.span('initial page load'):
+            driver.get(base_url)
+            time.sleep(3)
         
         while page_count < max_pages:
             page_count += 1
@@ -55,33 +64,37 @@ def scrape_restaurant_week():
             # Handle lazy loading by scrolling through the page
             print("Loading all cards...")
             
-            # Scroll down incrementally
-            for scroll_step in range(5):
-                driver.execute_script(f"window.scrollTo(0, {(scroll_step + 1) * 500});")
-                time.sleep(0.3)
+            with run.span('lazy-load scrolling'):
+                # Scroll down incrementally
+                for scroll_step in range(5):
+                    driver.execute_script(f"window.scrollTo(0, {(scroll_step + 1) * 500});")
+                    time.sleep(0.3)
             
-            # Scroll to bottom
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(1)
+                # Scroll to bottom
+                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+                time.sleep(1)
             
-            # Scroll back to top
-            driver.execute_script("window.scrollTo(0, 0);")
-            time.sleep(1)
+                # Scroll back to top
+                driver.execute_script("window.scrollTo(0, 0);")
+                time.sleep(1)
             
             # Wait for restaurant cards to load
             try:
-                WebDriverWait(driver, 10).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "h3.CardHeading_headline__qu1q3"))
-                )
+                with run.span('wait for cards'):
+                    WebDriverWait(driver, 10).until(
+                        EC.presence_of_element_located((By.CSS_SELECTOR, "h3.CardHeading_headline__qu1q3"))
+                    )
             except:
                 print("  ⚠ Timeout waiting for restaurant cards to load")
+                run.count('card load timeouts')
                 break
             
-            # Find all restaurant names
-            restaurant_names = driver.find_elements(By.CSS_SELECTOR, "h3.CardHeading_headline__qu1q3")
-            
-            # Find all tag containers (for cuisine and neighborhood)
-            tag_containers = driver.find_elements(By.CSS_SELECTOR, "div.PromotionCardGrid_taglines__qTyHJ")
+            with run.span('find cards'):
+                # Find all restaurant names
+                restaurant_names = driver.find_elements(By.CSS_SELECTOR, "h3.CardHeading_headline__qu1q3")
+                
+                # Find all tag containers (for cuisine and neighborhood)
+                tag_containers = driver.find_elements(By.CSS_SELECTOR, "div.PromotionCardGrid_taglines__qTyHJ")
             
             num_restaurants = len(restaurant_names)
             print(f"Found {num_restaurants} restaurants on this page")
@@ -116,15 +129,19 @@ def scrape_restaurant_week():
                         'Neighborhood': neighborhood
                     })
                     
+                    run.count('rows processed')
                     print(f"  {i+1}. {restaurant_name} | {cuisine} | {neighborhood}")
                     
                 except Exception as e:
                     print(f"  ✗ Error processing restaurant {i+1}: {str(e)[:50]}")
+                    run.count('failures')
                     continue
             
             print(f"\n  📊 Total restaurants collected: {len(all_restaurants)}")
+            run.count('pages scraped')
             
             # Move to next page
+            pagination_start = time.perf_counter()
             try:
                 # Scroll to pagination area
                 driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
@@ -158,12 +175,15 @@ def scrape_restaurant_week():
             except Exception as e:
                 print(f"\n  ℹ Could not find next button - reached the end")
                 break
+            finally:
+                run.observe('pagination', (time.perf_counter() - pagination_start) * 1000)
         
     finally:
         # Close the browser
         print("\n" + "=" * 80)
         print("Closing browser...")
-        driver.quit()
+        with run.span('browser shutdown'):
+            driver.quit()
     
     # Write to CSV
     output_file = 'nyc_restaurant_week.csv'
@@ -173,7 +193,7 @@ def scrape_restaurant_week():
     print("=" * 80)
     
     try:
-        with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
+        with run.span('write csv'), open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
             fieldnames = ['Restaurant', 'Cuisine', 'Neighborhood']
             writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
             
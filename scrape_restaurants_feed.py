@@ -0,0 +1,391 @@
+# NYC Restaurant Week web scraping - fast path
+# ============================================
+# The listing pages are rendered by Next.js, which ships every page's data as JSON inside a
+# <script id="__NEXT_DATA__"> tag. Reading that JSON with a plain HTTP client gets the same
+# name/cuisine/neighborhood fields the Selenium scraper reads off the cards, without starting
+# Chrome, scrolling for lazy loading, or clicking through 55 pages.
+#
+# If the first page can't be fetched, or its data can't be found, parsed, or has no recognizable
+# grid of cards (i.e. the site changed or blocked us), this falls back to the Selenium scraper in
+# scrape_restaurants_cards_only.py. So does anything that would leave the list incomplete: a later
+# page failing, or pages that don't follow ?page= (repeating page 1, or empty before the last).
+#
+# Usage:
+#     python scrape_restaurants_feed.py               # fetch from the website
+#     python scrape_restaurants_feed.py saved.html    # parse saved page(s) / JSON instead
+#     python scrape_restaurants_feed.py --check       # check the parser against fixtures/
+
+import csv
+import json
+import os
+import re
+import sys
+
+from instrumentation import PipelineRun
+from http_client import ApiClient
+
+BASE_URL = "https://www.nyctourism.com/restaurant-week/"
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+MAX_PAGES = 55
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+NEXT_DATA_RE = re.compile(r'<script[^>]*id="__NEXT_DATA__"[^>]*>(.*?)</script>', re.DOTALL)
+
+# Keys the page data might use for a card's name and its tag list
+NAME_KEYS = ['headline', 'title', 'name']
+TAG_KEYS = ['tags', 'taglines', 'categories']
+TAG_TEXT_KEYS = ['title', 'name', 'label', 'text', 'value']
+# Keys the page data might use for the number of listing pages
+PAGE_COUNT_KEYS = ['totalPages', 'pageCount', 'numPages', 'lastPage']
+
+
+class FeedSchemaError(Exception):
+    """
+    The page didn't contain data in a shape we know how to read.
+    """
+
+
+def extract_page_data(text):
+    """
+    Pull the serialized page data out of an HTML page (or accept a JSON document as-is).
+    """
+    stripped = text.lstrip()
+    if stripped.startswith('{'):
+        payload = stripped
+    else:
+        match = NEXT_DATA_RE.search(text)
+        if not match:
+            raise FeedSchemaError("No __NEXT_DATA__ script found in page")
+        payload = match.group(1)
+    try:
+        return json.loads(payload)
+    except json.JSONDecodeError as e:
+        raise FeedSchemaError(f"Page data is not valid JSON ({e})") from e
+
+
+def _tag_text(tag):
+    if isinstance(tag, str):
+        return tag.strip()
+    if isinstance(tag, dict):
+        for key in TAG_TEXT_KEYS:
+            if isinstance(tag.get(key), str):
+                return tag[key].strip()
+    return ''
+
+
+def _tag_kind(tag):
+    # Some feeds label their tags ({"type": "cuisine", ...}); use that when it's there
+    if isinstance(tag, dict):
+        kind = ' '.join(str(tag.get(key, '')) for key in ['type', 'category', 'taxonomy', 'kind']).lower()
+        if 'cuisine' in kind:
+            return 'cuisine'
+        if any(word in kind for word in ['neighborhood', 'neighbourhood', 'area', 'borough', 'location']):
+            return 'neighborhood'
+    return None
+
+
+def _card_from(node):
+    # A card is any object with a name and a list of tags, like the headline + taglines on the page
+    name = next((node[key] for key in NAME_KEYS if isinstance(node.get(key), str)), None)
+    tags = next((node[key] for key in TAG_KEYS if isinstance(node.get(key), list)), None)
+    if not name or not tags:
+        return None
+
+    cuisine = ""
+    neighborhood = ""
+    positional = []
+    for tag in tags:
+        text = _tag_text(tag)
+        if not text:
+            continue
+        kind = _tag_kind(tag)
+        if kind == 'cuisine' and not cuisine:
+            cuisine = text
+        elif kind == 'neighborhood' and not neighborhood:
+            neighborhood = text
+        else:
+            positional.append(text)
+
+    # Otherwise, same as the cards: first tag is cuisine, second is neighborhood
+    if not cuisine and positional:
+        cuisine = positional.pop(0)
+    if not neighborhood and positional:
+        neighborhood = positional.pop(0)
+
+    return {'Restaurant': name.strip(), 'Cuisine': cuisine, 'Neighborhood': neighborhood}
+
+
+def _card_key(card):
+    return (card['Restaurant'], card['Neighborhood'])
+
+
+def _card_grid(items, min_cards):
+    # Cards from a list that looks like the listing grid: at least min_cards card-shaped siblings,
+    # making up most of the list's objects, and mostly tagged with both cuisine and neighborhood
+    objects = [item for item in items if isinstance(item, dict)]
+    cards = [card for card in map(_card_from, objects) if card]
+    if not cards or len(cards) < min_cards or len(cards) * 2 < len(objects):
+        return []
+    tagged = sum(1 for card in cards if card['Cuisine'] and card['Neighborhood'])
+    if tagged * 2 < len(cards):
+        return []
+    return cards
+
+
+def _page_props(data):
+    # Next.js puts the page's own data under props.pageProps; everything else is framework state
+    props = data.get('props') if isinstance(data, dict) else None
+    if isinstance(props, dict) and isinstance(props.get('pageProps'), (dict, list)):
+        return props['pageProps']
+    return data
+
+
+def find_cards(data, min_cards=2):
+    """
+    Walk the page data and return the restaurant cards from every list shaped like a card grid,
+    in page order. Lone objects with a title and tags (e.g. the page's own SEO block) are not
+    cards, and the walk carries on into their children either way.
+
+    A grid needs at least min_cards cards. Two is the schema check for the first page; once
+    that has found the grid, pass 1 so a last page holding a single restaurant isn't dropped.
+    """
+    cards = []
+    stack = [_page_props(data)]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            stack.extend(reversed(list(node.values())))
+        elif isinstance(node, list):
+            cards.extend(_card_grid(node, min_cards))
+            stack.extend(reversed(node))
+    return cards
+
+
+def find_page_count(data):
+    """
+    Number of listing pages if the page data says, otherwise None.
+    """
+    stack = [_page_props(data)]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            for key in PAGE_COUNT_KEYS:
+                value = node.get(key)
+                if isinstance(value, int) and not isinstance(value, bool) and value > 0:
+                    return value
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            stack.extend(node)
+    return None
+
+
+def _status_code(error):
+    # HTTP status of a failed request (requests.HTTPError / httpx.HTTPStatusError), if any
+    return getattr(getattr(error, 'response', None), 'status_code', None)
+
+
+def scrape_feed(run, client=None, max_pages=MAX_PAGES):
+    """
+    Fetch listing pages over plain HTTP and parse their cards. Reads the page count from the
+    first page when it's there; otherwise stops at the first page with no cards (or a 404).
+
+    Raises FeedSchemaError - so the caller falls back to Selenium rather than saving part of the
+    list - if the first page has no readable cards, a page can't be fetched or read, a page only
+    repeats earlier cards (the site ignored ?page=), or a page before the last one is empty.
+    """
+    all_restaurants = []
+    seen = set()
+    page_count = None
+    owns_client = client is None
+    if owns_client:
+        client = ApiClient(run=run, headers={'User-Agent': USER_AGENT})
+
+    try:
+        for page in range(1, max_pages + 1):
+            params = {'page': page} if page > 1 else None
+            try:
+                with run.span('fetch pages'):
+                    text = client.get_text(BASE_URL, params=params, metric='page fetch')
+            except Exception as e:
+                if page == 1:
+                    # Blocked (403/bot wall), unreachable, etc. - let the caller fall back
+                    raise FeedSchemaError(f"First page could not be fetched ({e})") from e
+                if page_count is None and _status_code(e) == 404:
+                    print(f"  ℹ Page {page} not found - reached the end")
+                    break
+                raise FeedSchemaError(f"Page {page} could not be fetched ({e})") from e
+            with run.span('parse pages'):
+                data = extract_page_data(text)
+                cards = find_cards(data, min_cards=2 if page == 1 else 1)
+                if page == 1:
+                    page_count = find_page_count(data)
+
+            new = [card for card in cards if _card_key(card) not in seen]
+            if page == 1 and not new:
+                raise FeedSchemaError("Page data has no restaurant cards")
+            if cards and not new:
+                raise FeedSchemaError(f"Page {page} only repeats earlier cards - the site may ignore ?page=")
+            if not new:
+                if page_count is not None:
+                    raise FeedSchemaError(f"Page {page} of {page_count} has no restaurant cards")
+                break
+
+            for card in new:
+                seen.add(_card_key(card))
+                all_restaurants.append(card)
+            run.count('pages scraped')
+            print(f"Page {page}: {len(new)} restaurants ({len(all_restaurants)} total)")
+            if page_count is not None and page >= page_count:
+                break
+    finally:
+        if owns_client:
+            client.close()
+
+    run.count('rows processed', len(all_restaurants))
+    return all_restaurants
+
+
+def parse_saved(paths, run=None):
+    """
+    Parse restaurants from saved HTML pages or JSON documents instead of fetching them.
+    """
+    all_restaurants = []
+    seen = set()
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            # Strict grid check until the first page with cards, as in scrape_feed
+            cards = find_cards(extract_page_data(f.read()), min_cards=1 if seen else 2)
+        for card in cards:
+            if _card_key(card) not in seen:
+                seen.add(_card_key(card))
+                all_restaurants.append(card)
+    if not all_restaurants:
+        raise FeedSchemaError("Saved pages have no restaurant cards")
+    if run:
+        run.count('rows processed', len(all_restaurants))
+    return all_restaurants
+
+
+def write_restaurants(all_restaurants, output_file='nyc_restaurant_week.csv'):
+    with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=['Restaurant', 'Cuisine', 'Neighborhood'])
+        writer.writeheader()
+        for restaurant in all_restaurants:
+            writer.writerow(restaurant)
+    print(f"✓ Successfully saved {len(all_restaurants)} restaurants to: {output_file}")
+    return output_file
+
+
+def _check_fixtures():
+    # Parse the saved pages in fixtures/ (directly, or served as pages 1, 2, ... by a stub client)
+    # and compare against the cards they're known to contain, then make sure every way the feed
+    # can break ends in a FeedSchemaError (i.e. the Selenium fallback, not a partial CSV)
+    import requests
+
+    def fixture(name):
+        return os.path.join(FIXTURES_DIR, name)
+
+    class FixtureClient:
+        # Serves each fixture file (or raises each error) as listing page 1, 2, ...; 404 after that
+        def __init__(self, *pages):
+            self.pages = pages
+
+        def get_text(self, url, params=None, metric='api'):
+            page = (params or {}).get('page', 1)
+            if page > len(self.pages):
+                response = requests.Response()
+                response.status_code = 404
+                raise requests.HTTPError("404 Client Error: Not Found", response=response)
+            if isinstance(self.pages[page - 1], Exception):
+                raise self.pages[page - 1]
+            with open(fixture(self.pages[page - 1]), encoding='utf-8') as f:
+                return f.read()
+
+    def feed(*pages):
+        return lambda: scrape_feed(PipelineRun('check'), client=FixtureClient(*pages))
+
+    typed = [
+        ('Abc Kitchen', 'American', 'Flatiron District'),
+        ('Carbone', 'Italian', 'Greenwich Village'),
+        ('Jungsik', 'Korean', 'Tribeca'),
+    ]
+    expected = [
+        ('typed tags', lambda: parse_saved([fixture('next_data_typed_tags.html')]), typed),
+        ('positional tags', lambda: parse_saved([fixture('next_data_positional_tags.json')]), [
+            ('Dhamaka', 'Indian', 'Lower East Side'),
+            ('Le Bernardin', 'French', 'Midtown West'),
+            ('Peter Luger', 'Steakhouse', 'Williamsburg'),
+        ]),
+        ('one-card last page, then 404', feed('next_data_typed_tags.html', 'next_data_last_page.json'),
+         typed + [('Thai Diner', 'Thai', 'Nolita')]),
+        ('page count from page data', feed('next_data_page_count.json', 'next_data_last_page.json',
+                                           RuntimeError("fetched past the last page")), [
+            ('Atomix', 'Korean', 'NoMad'),
+            ('Via Carota', 'Italian', 'West Village'),
+            ('Thai Diner', 'Thai', 'Nolita'),
+        ]),
+    ]
+    fallbacks = [
+        ('page with no card grid', lambda: parse_saved([fixture('next_data_no_cards.html')])),
+        ('malformed page data', lambda: parse_saved([fixture('next_data_malformed.html')])),
+        ('blocked first page', feed(RuntimeError("403 Client Error: Forbidden"))),
+        ('site ignores ?page=', feed('next_data_typed_tags.html', 'next_data_typed_tags.html')),
+        ('later page times out', feed('next_data_typed_tags.html', TimeoutError("Read timed out"))),
+        ('empty page before the last', feed('next_data_page_count.json', 'next_data_no_cards.html')),
+    ]
+
+    print("=" * 80)
+    print("Feed parser check (fixtures/)")
+    print("=" * 80)
+
+    results = []
+    for name, parse, cards in expected:
+        try:
+            found = [(r['Restaurant'], r['Cuisine'], r['Neighborhood']) for r in parse()]
+        except FeedSchemaError as e:
+            found = f"FeedSchemaError: {e}"
+        ok = found == cards
+        results.append((ok, f"{name}: " + (f"{len(found)} restaurants" if ok else f"got {found}")))
+
+    for name, parse in fallbacks:
+        try:
+            parse()
+            ok, detail = False, "parsed without error"
+        except FeedSchemaError as e:
+            ok, detail = True, str(e)
+        results.append((ok, f"{name}: falls back ({detail[:60]})"))
+
+    print()
+    for ok, line in results:
+        print(f"  {'✓' if ok else '✗'} {line}")
+    failures = sum(not ok for ok, _ in results)
+    print(f"\n{'✓ All checks passed' if not failures else f'✗ {failures} check(s) failed'}")
+    return failures == 0
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ['--check']:
+        sys.exit(0 if _check_fixtures() else 1)
+
+    print("=" * 80)
+    print("NYC Restaurant Week Scraper - Page Data (no browser)")
+    print("=" * 80)
+
+    with PipelineRun('scrape_restaurants_feed') as run:
+        try:
+            if len(sys.argv) > 1:
+                restaurants = parse_saved(sys.argv[1:], run)
+            else:
+                restaurants = scrape_feed(run)
+        except FeedSchemaError as e:
+            restaurants = None
+            run.count('fallbacks to selenium')
+            print(f"\n⚠ Could not read page data ({e}) - falling back to the Selenium scraper")
+
+        if restaurants is not None:
+            with run.span('write csv'):
+                write_restaurants(restaurants)
+
+    if restaurants is None:
+        from scrape_restaurants_cards_only import scrape_restaurant_week
+        scrape_restaurant_week()
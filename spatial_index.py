@@ -0,0 +1,233 @@
+# NYC Restaurant Week spatial index
+# =================================
+# Builds a KD-tree over the geocoded restaurants so we can answer "what's within 500m of me" and
+# "closest Italian to here" in logarithmic time instead of scanning every row. Points are stored
+# as 3D unit vectors, so straight-line (chord) distance orders points exactly like the haversine
+# great-circle distance that gets reported back.
+#
+# Also builds the coarse lat/lon grid that gets embedded in the map for the "Near Me" button.
+
+import heapq
+import math
+
+import pandas as pd
+
+EARTH_RADIUS_M = 6371008.8
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    """
+    Great-circle distance in meters between two lat/lon points.
+    """
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _to_xyz(lat, lon):
+    phi = math.radians(lat)
+    lmb = math.radians(lon)
+    return (math.cos(phi) * math.cos(lmb), math.cos(phi) * math.sin(lmb), math.sin(phi))
+
+
+def _chord_from_meters(meters):
+    # Straight-line distance through the sphere (unit radius) for a given arc length
+    return 2 * math.sin(min(meters, math.pi * EARTH_RADIUS_M) / (2 * EARTH_RADIUS_M))
+
+
+def _meters_from_chord(chord):
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, chord / 2))
+
+
+class RestaurantIndex:
+    """
+    KD-tree over restaurant coordinates with k-nearest and radius queries.
+    """
+
+    def __init__(self, df):
+        df = df.dropna(subset=['Latitude', 'Longitude']).reset_index(drop=True)
+        self.df = df
+        self.lats = df['Latitude'].astype(float).tolist()
+        self.lons = df['Longitude'].astype(float).tolist()
+        self.cuisines = df['Cuisine'].fillna('Unknown').tolist() if 'Cuisine' in df else None
+        self.points = [_to_xyz(lat, lon) for lat, lon in zip(self.lats, self.lons)]
+
+        # Flat node arrays: the node at position i splits on axis[i] through point order[i],
+        # with children at left[i] / right[i] (-1 if empty)
+        self.order = []
+        self.axis = []
+        self.left = []
+        self.right = []
+        self.root = self._build(list(range(len(self.points))), 0)
+
+    @classmethod
+    def from_csv(cls, csv_file='restaurants_geocoded.csv'):
+        return cls(pd.read_csv(csv_file))
+
+    def __len__(self):
+        return len(self.points)
+
+    def _build(self, ids, depth):
+        if not ids:
+            return -1
+        axis = depth % 3
+        ids.sort(key=lambda i: self.points[i][axis])
+        mid = len(ids) // 2
+
+        node = len(self.order)
+        self.order.append(ids[mid])
+        self.axis.append(axis)
+        self.left.append(-1)
+        self.right.append(-1)
+
+        self.left[node] = self._build(ids[:mid], depth + 1)
+        self.right[node] = self._build(ids[mid + 1:], depth + 1)
+        return node
+
+    def _matches(self, i, cuisine):
+        return cuisine is None or self.cuisines is None or self.cuisines[i] == cuisine
+
+    def nearest(self, lat, lon, k=1, cuisine=None):
+        """
+        Return up to k (row index, distance in meters) pairs closest to lat/lon,
+        optionally restricted to one cuisine. Sorted nearest first.
+        """
+        if k <= 0 or self.root < 0:
+            return []
+        target = _to_xyz(lat, lon)
+        best = []  # max-heap of (-squared chord, row index)
+
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node < 0:
+                continue
+            i = self.order[node]
+            p = self.points[i]
+            d2 = (p[0] - target[0]) ** 2 + (p[1] - target[1]) ** 2 + (p[2] - target[2]) ** 2
+            if self._matches(i, cuisine):
+                if len(best) < k:
+                    heapq.heappush(best, (-d2, i))
+                elif d2 < -best[0][0]:
+                    heapq.heapreplace(best, (-d2, i))
+
+            diff = target[self.axis[node]] - p[self.axis[node]]
+            near, far = (self.left[node], self.right[node]) if diff < 0 else (self.right[node], self.left[node])
+            # Only descend into the far side if the splitting plane is closer than our worst match
+            if len(best) < k or diff * diff < -best[0][0]:
+                stack.append(far)
+            stack.append(near)
+
+        results = sorted((-neg_d2, i) for neg_d2, i in best)
+        return [(i, haversine_m(lat, lon, self.lats[i], self.lons[i])) for _, i in results]
+
+    def within_radius(self, lat, lon, radius_m, cuisine=None):
+        """
+        Return (row index, distance in meters) pairs within radius_m of lat/lon, nearest first.
+        """
+        if self.root < 0:
+            return []
+        target = _to_xyz(lat, lon)
+        # Tiny slack so points sitting exactly on the boundary aren't lost to rounding
+        r = _chord_from_meters(radius_m) + 1e-12
+        r2 = r * r
+        hits = []
+
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node < 0:
+                continue
+            i = self.order[node]
+            p = self.points[i]
+            d2 = (p[0] - target[0]) ** 2 + (p[1] - target[1]) ** 2 + (p[2] - target[2]) ** 2
+            if d2 <= r2 and self._matches(i, cuisine):
+                hits.append(i)
+
+            diff = target[self.axis[node]] - p[self.axis[node]]
+            if diff - r <= 0:
+                stack.append(self.left[node])
+            if diff + r >= 0:
+                stack.append(self.right[node])
+
+        results = [(i, haversine_m(lat, lon, self.lats[i], self.lons[i])) for i in hits]
+        results = [(i, d) for i, d in results if d <= radius_m]
+        results.sort(key=lambda item: item[1])
+        return results
+
+    def nearest_batch(self, points, k=1, cuisine=None):
+        """
+        k-nearest query for each (lat, lon) in points. Returns one result list per point.
+        """
+        return [self.nearest(lat, lon, k=k, cuisine=cuisine) for lat, lon in points]
+
+    def within_radius_batch(self, points, radius_m, cuisine=None):
+        """
+        Radius query for each (lat, lon) in points. Returns one result list per point.
+        """
+        return [self.within_radius(lat, lon, radius_m, cuisine=cuisine) for lat, lon in points]
+
+    def rows(self, results):
+        """
+        Turn (row index, distance) pairs into a DataFrame with a Distance (m) column.
+        """
+        ids = [i for i, _ in results]
+        out = self.df.iloc[ids].copy()
+        out['Distance (m)'] = [round(d, 1) for _, d in results]
+        return out
+
+
+def build_grid(lats, lons, cell_size_m=500):
+    """
+    Bucket points into a regular lat/lon grid (at least cell_size_m on a side) so the map's
+    "Near Me" search only has to look at the cells around the user.
+
+    Returns a JSON-friendly dict: origin, cell size in degrees, and "row,col" -> point indices.
+    """
+    lats = list(lats)
+    lons = list(lons)
+    if not lats:
+        return {'origin': [0, 0], 'cell': [0, 0], 'cellMeters': cell_size_m, 'cells': {}}
+
+    lat0 = min(lats)
+    lon0 = min(lons)
+    # Size the columns for the latitude farthest from the equator, where degrees of longitude
+    # are shortest, so every cell is at least cell_size_m wide (the Near Me search relies on it)
+    widest_lat = max(abs(lat0), abs(max(lats)))
+    dlat = math.degrees(cell_size_m / EARTH_RADIUS_M)
+    dlon = dlat / max(math.cos(math.radians(widest_lat)), 1e-6)
+
+    cells = {}
+    for i, (lat, lon) in enumerate(zip(lats, lons)):
+        key = f"{int((lat - lat0) // dlat)},{int((lon - lon0) // dlon)}"
+        cells.setdefault(key, []).append(i)
+
+    return {'origin': [lat0, lon0], 'cell': [dlat, dlon], 'cellMeters': cell_size_m, 'cells': cells}
+
+
+if __name__ == "__main__":
+    import sys
+
+    index = RestaurantIndex.from_csv()
+    print(f"✓ Indexed {len(index)} restaurants")
+
+    # Usage: python spatial_index.py <lat> <lon> [radius_m] [cuisine]
+    if len(sys.argv) >= 3:
+        lat, lon = float(sys.argv[1]), float(sys.argv[2])
+        radius = float(sys.argv[3]) if len(sys.argv) >= 4 else 500
+        cuisine = sys.argv[4] if len(sys.argv) >= 5 else None
+    else:
+        # Times Square
+        lat, lon, radius, cuisine = 40.7580, -73.9855, 500, None
+
+    nearby = index.within_radius(lat, lon, radius, cuisine=cuisine)
+    print(f"\nWithin {radius:.0f}m of ({lat}, {lon}): {len(nearby)} restaurants")
+    for _, row in index.rows(nearby).head(20).iterrows():
+        print(f"  - {row['Restaurant']} ({row['Cuisine']}) - {row['Distance (m)']}m")
+
+    print("\nClosest 5:")
+    for _, row in index.rows(index.nearest(lat, lon, k=5, cuisine=cuisine)).iterrows():
+        print(f"  - {row['Restaurant']} ({row['Cuisine']}) - {row['Distance (m)']}m")
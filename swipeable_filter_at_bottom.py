@@ -2,531 +2,1095 @@
 # ================================================================================
 # Features:
 # - Custom dropdown filter for cuisines
+# - Season/city filter when several datasets are merged into one map
+# - Neighborhood filter, with live restaurant counts next to every cuisine/neighborhood option
 # - Search functionality
 # - Hover tooltips with restaurant name, cuisine, address
+# - Only markers in (or near) the current view are created, refreshed as the map moves
 # - MOBILE FRIENDLY: Panel at bottom that can be swiped down to minimize
 
 import folium
 from folium import IFrame
 import pandas as pd
+import hashlib
 import json
+import os
+import pickle
+import re
+import numpy as np
 from branca.element import Template, MacroElement
+from spatial_index import build_grid, haversine_m
+from instrumentation import PipelineRun
 
-def create_advanced_map(csv_file='filename', output_file='<filename>.html'):
-    """
-    Create an advanced interactive map with swipeable bottom panel on mobile.
-    """
-    
-    print("=" * 80)
-    print("Creating Advanced Interactive Restaurant Map (Swipeable Bottom Panel)")
-    print("=" * 80)
-    
-    # Read the CSV
-    print(f"\nReading {csv_file}...")
-    df = pd.read_csv(csv_file)
-    
-    # Remove rows without coordinates
-    df = df.dropna(subset=['Latitude', 'Longitude'])
-    print(f"✓ Loaded {len(df)} restaurants with coordinates")
-    
-    # Fill missing values
-    df['Cuisine'] = df['Cuisine'].fillna('Unknown')
-    df['Restaurant'] = df['Restaurant'].fillna('Unknown')
-    df['Address'] = df['Address'].fillna('Address not available')
-    
-    # Get unique cuisines
-    cuisines = sorted(df['Cuisine'].unique())
-    print(f"✓ Found {len(cuisines)} unique cuisines")
-    
-    # Create the base map
-    print("\nCreating map...")
-    center_lat = df['Latitude'].mean()
-    center_lon = df['Longitude'].mean()
-    
-    m = folium.Map(
-        location=[center_lat, center_lon],
-        zoom_start=12,
-        tiles='CartoDB positron'
-    )
-    
-    # Prepare data for JavaScript
-    restaurants_data = []
-    for idx, row in df.iterrows():
-        restaurants_data.append({
-            'name': row['Restaurant'],
-            'cuisine': row['Cuisine'],
-            'address': row['Address'],
-            'lat': row['Latitude'],
-            'lon': row['Longitude']
-        })
-    
-    # Convert to JSON for embedding
-    restaurants_json = json.dumps(restaurants_data)
-    
-    # Custom HTML/CSS/JavaScript for filtering with swipeable bottom panel
-    template = """
-    {% macro html(this, kwargs) %}
-    
-    <!doctype html>
-    <html lang="en">
-    <head>
-        <meta charset="utf-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1">
-        <style>
+# The panel's data payload is streamed into the saved page in place of this JS string
+PANEL_DATA_PLACEHOLDER = '"__PANEL_DATA__"'
+
+# Size of each write when streaming the payload to the output file
+CHUNK_SIZE = 1 << 16
+
+# Listings with the same normalized name closer than this are treated as one restaurant
+MATCH_METERS = 150
+
+# Bump when the cached merge format or matching rules change
+CACHE_VERSION = 2
+
+# Custom HTML/CSS/JavaScript for filtering with swipeable bottom panel
+PANEL_TEMPLATE = """
+{% macro html(this, kwargs) %}
+
+<!doctype html>
+<html lang="en">
+<head>
+    <meta charset="utf-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1">
+    <style>
+        #filter-panel {
+            position: fixed;
+            top: 10px;
+            left: 60px;
+            background: white;
+            padding: 15px;
+            border-radius: 8px;
+            box-shadow: 0 2px 8px rgba(0,0,0,0.2);
+            z-index: 9999;
+            max-width: 350px;
+            font-family: Arial, sans-serif;
+            transition: transform 0.3s ease;
+            will-change: transform;
+        }
+
+        #filter-panel.dragging {
+            transition: none;
+        }
+
+        #filter-panel h3 {
+            margin: 0 0 10px 0;
+            font-size: 20px;
+            color: #333;
+        }
+
+        #filter-panel label {
+            display: block;
+            margin: 10px 0 5px 0;
+            font-weight: bold;
+            font-size: 14px;
+        }
+
+        #filter-panel select {
+            width: 100%;
+            padding: 8px;
+            border: 1px solid #ddd;
+            border-radius: 4px;
+            font-size: 14px;
+            box-sizing: border-box;
+        }
+
+        #filter-panel input[type="text"] {
+            width: 100%;
+            padding: 8px;
+            border: 1px solid #ddd;
+            border-radius: 4px;
+            font-size: 14px;
+            box-sizing: border-box;
+        }
+
+        #filter-panel button {
+            width: 100%;
+            padding: 10px;
+            margin-top: 10px;
+            background-color: #2196F3;
+            color: white;
+            border: none;
+            border-radius: 4px;
+            cursor: pointer;
+            font-size: 14px;
+            font-weight: bold;
+        }
+
+        #filter-panel button:hover {
+            background-color: #1976D2;
+        }
+
+        .info-text {
+            font-size: 12px;
+            color: #666;
+            margin-top: 10px;
+            padding-top: 10px;
+            border-top: 1px solid #eee;
+        }
+
+        #restaurant-count {
+            font-weight: bold;
+            color: #2196F3;
+        }
+
+        /* Drag handle */
+        .drag-handle {
+            display: none;
+        }
+
+        .drag-handle:active {
+            cursor: grabbing;
+            background: #999;
+        }
+
+        /* Swipeable header area */
+        .swipe-area {
+            display: none;
+        }
+
+        .swipe-area:active {
+            cursor: grabbing;
+        }
+
+        /* Mobile styles - move to bottom with swipe functionality */
+        @media (max-width: 768px) {
             #filter-panel {
-                position: fixed;
-                top: 10px;
-                left: 60px;
-                background: white;
-                padding: 15px;
-                border-radius: 8px;
-                box-shadow: 0 2px 8px rgba(0,0,0,0.2);
-                z-index: 9999;
-                max-width: 350px;
-                font-family: Arial, sans-serif;
-                transition: transform 0.3s ease;
-                will-change: transform;
+                top: auto;
+                bottom: 0;
+                left: 0;
+                right: 0;
+                max-width: none;
+                border-radius: 16px 16px 0 0;
+                box-shadow: 0 -2px 12px rgba(0,0,0,0.3);
+                max-height: 55vh;
+                overflow-y: auto;
+                padding: 12px 15px 20px 15px;
             }
-            
-            #filter-panel.dragging {
-                transition: none;
+
+            #filter-panel.collapsed {
+                transform: translateY(calc(100% - 85px));
             }
-            
+
             #filter-panel h3 {
-                margin: 0 0 10px 0;
-                font-size: 20px;
-                color: #333;
+                font-size: 18px;
+                margin-bottom: 8px;
             }
-            
+
             #filter-panel label {
-                display: block;
-                margin: 10px 0 5px 0;
-                font-weight: bold;
-                font-size: 14px;
+                margin: 8px 0 4px 0;
+                font-size: 13px;
             }
-            
-            #filter-panel select {
-                width: 100%;
-                padding: 8px;
-                border: 1px solid #ddd;
-                border-radius: 4px;
-                font-size: 14px;
-                box-sizing: border-box;
-            }
-            
+
+            #filter-panel select,
             #filter-panel input[type="text"] {
-                width: 100%;
-                padding: 8px;
-                border: 1px solid #ddd;
-                border-radius: 4px;
-                font-size: 14px;
-                box-sizing: border-box;
+                padding: 10px 8px;
+                font-size: 16px; /* Prevents zoom on iOS */
             }
-            
+
             #filter-panel button {
-                width: 100%;
-                padding: 10px;
-                margin-top: 10px;
-                background-color: #2196F3;
-                color: white;
-                border: none;
-                border-radius: 4px;
-                cursor: pointer;
-                font-size: 14px;
-                font-weight: bold;
+                padding: 12px;
+                margin-top: 8px;
+                font-size: 15px;
             }
-            
-            #filter-panel button:hover {
-                background-color: #1976D2;
-            }
-            
+
             .info-text {
-                font-size: 12px;
-                color: #666;
-                margin-top: 10px;
-                padding-top: 10px;
-                border-top: 1px solid #eee;
+                font-size: 11px;
+                margin-top: 8px;
+                padding-top: 8px;
             }
-            
-            #restaurant-count {
-                font-weight: bold;
-                color: #2196F3;
-            }
-            
-            /* Drag handle */
+
             .drag-handle {
-                display: none;
-            }
-            
-            .drag-handle:active {
-                cursor: grabbing;
-                background: #999;
+                display: block;
+                width: 40px;
+                height: 5px;
+                background: #bbb;
+                border-radius: 3px;
+                margin: 0 auto 15px auto;
+                position: relative;
+                top: 4px;
+                cursor: grab;
             }
-            
-            /* Swipeable header area */
+
             .swipe-area {
-                display: none;
-            }
-            
-            .swipe-area:active {
-                cursor: grabbing;
+                display: block;
+                position: absolute;
+                top: 0;
+                left: 0;
+                right: 0;
+                height: 80px;
+                cursor: grab;
+                z-index: 1;
             }
-            
-            /* Mobile styles - move to bottom with swipe functionality */
-            @media (max-width: 768px) {
-                #filter-panel {
-                    top: auto;
-                    bottom: 0;
-                    left: 0;
-                    right: 0;
-                    max-width: none;
-                    border-radius: 16px 16px 0 0;
-                    box-shadow: 0 -2px 12px rgba(0,0,0,0.3);
-                    max-height: 55vh;
-                    overflow-y: auto;
-                    padding: 12px 15px 20px 15px;
-                }
-                
-                #filter-panel.collapsed {
-                    transform: translateY(calc(100% - 85px));
-                }
-                
-                #filter-panel h3 {
-                    font-size: 18px;
-                    margin-bottom: 8px;
-                }
-                
-                #filter-panel label {
-                    margin: 8px 0 4px 0;
-                    font-size: 13px;
-                }
-                
-                #filter-panel select,
-                #filter-panel input[type="text"] {
-                    padding: 10px 8px;
-                    font-size: 16px; /* Prevents zoom on iOS */
-                }
-                
-                #filter-panel button {
-                    padding: 12px;
-                    margin-top: 8px;
-                    font-size: 15px;
-                }
-                
-                .info-text {
-                    font-size: 11px;
-                    margin-top: 8px;
-                    padding-top: 8px;
-                }
-                
-                .drag-handle {
-                    display: block;
-                    width: 40px;
-                    height: 5px;
-                    background: #bbb;
-                    border-radius: 3px;
-                    margin: 0 auto 15px auto;
-                    position: relative;
-                    top: 4px;
-                    cursor: grab;
-                }
-                
-                .swipe-area {
-                    display: block;
-                    position: absolute;
-                    top: 0;
-                    left: 0;
-                    right: 0;
-                    height: 80px;
-                    cursor: grab;
-                    z-index: 1;
-                }
-                
-                #filter-panel h3 {
-                    position: relative;
-                    z-index: 2;
-                    pointer-events: none;
-                }
+
+            #filter-panel h3 {
+                position: relative;
+                z-index: 2;
+                pointer-events: none;
             }
-            
-            /* Very small screens */
-            @media (max-width: 480px) {
-                #filter-panel {
-                    max-height: 60vh;
-                }
+        }
+
+        /* Very small screens */
+        @media (max-width: 480px) {
+            #filter-panel {
+                max-height: 60vh;
             }
-        </style>
-    </head>
-    <body>
-        <div id="filter-panel">
-            <div class="drag-handle" id="drag-handle"></div>
-            <div class="swipe-area" id="swipe-area"></div>
-            
-            <h3><strong>NYC Restaurant Week 2026</strong><br><span style="font-size: 16px; font-weight: normal;">Jan. 20th - Feb. 12th</span></h3>
-            
-            <label for="cuisine-filter">Filter by Cuisine:</label>
-            <select id="cuisine-filter">
-                <option value="all">All Cuisines</option>
+        }
+    </style>
+</head>
+<body>
+    <div id="filter-panel">
+        <div class="drag-handle" id="drag-handle"></div>
+        <div class="swipe-area" id="swipe-area"></div>
+
+        <h3><strong>NYC Restaurant Week 2026</strong><br><span style="font-size: 16px; font-weight: normal;">Jan. 20th - Feb. 12th</span></h3>
+
+        <div id="dataset-filter-group" style="display: none;">
+            <label for="dataset-filter">Filter by Season/City:</label>
+            <select id="dataset-filter">
+                <option value="all">All Seasons &amp; Cities</option>
             </select>
-            
-            <label for="search-input">Search Restaurant:</label>
-            <input type="text" id="search-input" placeholder="Type restaurant name...">
-            
-            <button onclick="applyFilters()">Apply Filters</button>
-            <button onclick="resetFilters()" style="background-color: #64B5F6;">Reset</button>
-            
-            <div class="info-text">
-                Showing <span id="restaurant-count">0</span> restaurants<br>
-                💡 Swipe down to minimize panel
-            </div>
         </div>
-        
-        <script>
-            // Restaurant data
-            var restaurantsData = """ + restaurants_json + """;
-            var markers = [];
-            var map = null;
-            
-            // Touch/swipe handling
-            var touchStartY = 0;
-            var touchCurrentY = 0;
-            var touchEndY = 0;
-            var isPanelCollapsed = false;
-            var isDragging = false;
-            var panel = null;
-            
-            // Wait for map to load
-            window.addEventListener('load', function() {
-                panel = document.getElementById('filter-panel');
-                
-                // Get map instance
-                setTimeout(function() {
-                    map = window.map_""" + m._id + """;
-                    if (map) {
-                        initializeMap();
-                    }
-                }, 500);
-                
-                // Initialize swipe functionality on mobile
-                if (window.innerWidth <= 768) {
-                    initializeSwipe();
+
+        <label for="cuisine-filter">Filter by Cuisine:</label>
+        <select id="cuisine-filter">
+            <option value="all">All Cuisines</option>
+        </select>
+
+        <label for="neighborhood-filter">Filter by Neighborhood:</label>
+        <select id="neighborhood-filter">
+            <option value="all">All Neighborhoods</option>
+        </select>
+
+        <label for="search-input">Search Restaurant:</label>
+        <input type="text" id="search-input" placeholder="Type restaurant name...">
+
+        <button onclick="applyFilters()">Apply Filters</button>
+        <button onclick="resetFilters()" style="background-color: #64B5F6;">Reset</button>
+        <button onclick="nearMe()" style="background-color: #4CAF50;">📍 Near Me</button>
+
+        <div class="info-text">
+            Showing <span id="restaurant-count">0</span> restaurants<br>
+            💡 Swipe down to minimize panel
+        </div>
+    </div>
+
+    <script>
+        // Restaurant data (written in chunks straight into the file by write_map)
+        var panelData = "__PANEL_DATA__";
+        var restaurantsData = panelData.restaurants;
+        var restaurantsGrid = panelData.grid;
+        var datasets = panelData.datasets;
+        // Restaurant ids per dataset, keyed by the dataset's position (its dropdown value)
+        var datasetSets = {};
+        var facets = panelData.facets;
+        // Per count cube: the cube as an Int32Array plus its cuisine and neighborhood totals
+        var facetCubes = {};
+        // Only restaurants inside the (padded) viewport get a Leaflet marker; markers holds
+        // those by restaurant id, and activeIds the ids that pass the current filters
+        var markers = {};
+        var activeIds = new Set();
+        var gridCells = [];
+        var gridBounds = null;
+        // "Near Me" only looks this far from the user
+        var nearMeMaxMeters = 10000;
+        var markerIcon = null;
+        var userMarker = null;
+        var map = null;
+
+        // Touch/swipe handling
+        var touchStartY = 0;
+        var touchCurrentY = 0;
+        var touchEndY = 0;
+        var isPanelCollapsed = false;
+        var isDragging = false;
+        var panel = null;
+
+        // Wait for map to load
+        window.addEventListener('load', function() {
+            panel = document.getElementById('filter-panel');
+
+            // Get map instance
+            setTimeout(function() {
+                map = window.{{ this.map_name }};
+                if (map) {
+                    initializeMap();
                 }
-            });
-            
-            function initializeSwipe() {
-                var swipeArea = document.getElementById('swipe-area');
-                
-                // Touch events on the swipe area (handle + header)
-                swipeArea.addEventListener('touchstart', handleTouchStart, {passive: true});
-                swipeArea.addEventListener('touchmove', handleTouchMove, {passive: false});
-                swipeArea.addEventListener('touchend', handleTouchEnd, {passive: true});
-                
-                // Also allow tapping the area to toggle
-                swipeArea.addEventListener('click', togglePanel);
-            }
-            
-            function handleTouchStart(e) {
-                touchStartY = e.touches[0].clientY;
-                touchCurrentY = touchStartY;
-                isDragging = true;
-                panel.classList.add('dragging');
+            }, 500);
+
+            // Initialize swipe functionality on mobile
+            if (window.innerWidth <= 768) {
+                initializeSwipe();
             }
-            
-            function handleTouchMove(e) {
-                if (!isDragging) return;
-                
-                e.preventDefault();
-                touchCurrentY = e.touches[0].clientY;
-                var deltaY = touchCurrentY - touchStartY;
-                
-                // Only apply transform if swiping in valid direction
-                if ((!isPanelCollapsed && deltaY > 0) || (isPanelCollapsed && deltaY < 0)) {
-                    // Limit the drag range
-                    if (!isPanelCollapsed && deltaY > 0) {
-                        var additionalOffset = Math.min(deltaY, 300);
-                        panel.style.transform = 'translateY(' + additionalOffset + 'px)';
-                    } else if (isPanelCollapsed && deltaY < 0) {
-                        var additionalOffset = Math.max(deltaY, -300);
-                        panel.style.transform = 'translateY(calc(100% - 85px + ' + additionalOffset + 'px))';
-                    }
+        });
+
+        function initializeSwipe() {
+            var swipeArea = document.getElementById('swipe-area');
+
+            // Touch events on the swipe area (handle + header)
+            swipeArea.addEventListener('touchstart', handleTouchStart, {passive: true});
+            swipeArea.addEventListener('touchmove', handleTouchMove, {passive: false});
+            swipeArea.addEventListener('touchend', handleTouchEnd, {passive: true});
+
+            // Also allow tapping the area to toggle
+            swipeArea.addEventListener('click', togglePanel);
+        }
+
+        function handleTouchStart(e) {
+            touchStartY = e.touches[0].clientY;
+            touchCurrentY = touchStartY;
+            isDragging = true;
+            panel.classList.add('dragging');
+        }
+
+        function handleTouchMove(e) {
+            if (!isDragging) return;
+
+            e.preventDefault();
+            touchCurrentY = e.touches[0].clientY;
+            var deltaY = touchCurrentY - touchStartY;
+
+            // Only apply transform if swiping in valid direction
+            if ((!isPanelCollapsed && deltaY > 0) || (isPanelCollapsed && deltaY < 0)) {
+                // Limit the drag range
+                if (!isPanelCollapsed && deltaY > 0) {
+                    var additionalOffset = Math.min(deltaY, 300);
+                    panel.style.transform = 'translateY(' + additionalOffset + 'px)';
+                } else if (isPanelCollapsed && deltaY < 0) {
+                    var additionalOffset = Math.max(deltaY, -300);
+                    panel.style.transform = 'translateY(calc(100% - 85px + ' + additionalOffset + 'px))';
                 }
             }
-            
-            function handleTouchEnd(e) {
-                if (!isDragging) return;
-                
-                isDragging = false;
-                panel.classList.remove('dragging');
-                panel.style.transform = '';
-                
-                touchEndY = touchCurrentY;
-                var swipeDistance = touchEndY - touchStartY;
-                
-                // Lower threshold for better responsiveness (30px instead of 50px)
-                if (swipeDistance > 30 && !isPanelCollapsed) {
-                    collapsePanel();
-                }
-                else if (swipeDistance < -30 && isPanelCollapsed) {
-                    expandPanel();
-                }
+        }
+
+        function handleTouchEnd(e) {
+            if (!isDragging) return;
+
+            isDragging = false;
+            panel.classList.remove('dragging');
+            panel.style.transform = '';
+
+            touchEndY = touchCurrentY;
+            var swipeDistance = touchEndY - touchStartY;
+
+            // Lower threshold for better responsiveness (30px instead of 50px)
+            if (swipeDistance > 30 && !isPanelCollapsed) {
+                collapsePanel();
             }
-            
-            function togglePanel() {
-                if (isPanelCollapsed) {
-                    expandPanel();
-                } else {
-                    collapsePanel();
-                }
+            else if (swipeDistance < -30 && isPanelCollapsed) {
+                expandPanel();
             }
-            
-            function collapsePanel() {
-                var panel = document.getElementById('filter-panel');
-                panel.classList.add('collapsed');
-                isPanelCollapsed = true;
+        }
+
+        function togglePanel() {
+            if (isPanelCollapsed) {
+                expandPanel();
+            } else {
+                collapsePanel();
             }
-            
-            function expandPanel() {
-                var panel = document.getElementById('filter-panel');
-                panel.classList.remove('collapsed');
-                isPanelCollapsed = false;
+        }
+
+        function collapsePanel() {
+            var panel = document.getElementById('filter-panel');
+            panel.classList.add('collapsed');
+            isPanelCollapsed = true;
+        }
+
+        function expandPanel() {
+            var panel = document.getElementById('filter-panel');
+            panel.classList.remove('collapsed');
+            isPanelCollapsed = false;
+        }
+
+        function initializeMap() {
+            // Populate season/city dropdown (only shown when more than one dataset is merged)
+            // Options use the dataset's position as their value, so a dataset labelled "all"
+            // can't be mistaken for "All Seasons & Cities"
+            var datasetFilter = document.getElementById('dataset-filter');
+            datasets.forEach(function(dataset, i) {
+                datasetSets[i] = new Set(dataset.ids);
+                var option = document.createElement('option');
+                option.value = String(i);
+                option.textContent = dataset.label;
+                datasetFilter.appendChild(option);
+            });
+            if (datasets.length > 1) {
+                document.getElementById('dataset-filter-group').style.display = 'block';
             }
-            
-            function initializeMap() {
-                // Populate cuisine dropdown
-                var cuisineFilter = document.getElementById('cuisine-filter');
-                var cuisines = [...new Set(restaurantsData.map(r => r.cuisine))].sort();
-                
-                cuisines.forEach(function(cuisine) {
-                    var option = document.createElement('option');
-                    option.value = cuisine;
-                    option.textContent = cuisine;
-                    cuisineFilter.appendChild(option);
-                });
-                
-                // Create all markers
-                createMarkers(restaurantsData);
-                
-                // Adjust map padding on mobile to account for bottom panel
-                if (window.innerWidth <= 768) {
-                    setTimeout(function() {
-                        map.invalidateSize();
-                    }, 100);
-                }
+
+            // Populate cuisine and neighborhood dropdowns
+            var cuisineFilter = document.getElementById('cuisine-filter');
+            facets.cuisines.forEach(function(cuisine) {
+                var option = document.createElement('option');
+                option.value = cuisine;
+                option.textContent = cuisine;
+                cuisineFilter.appendChild(option);
+            });
+
+            var neighborhoodFilter = document.getElementById('neighborhood-filter');
+            facets.neighborhoods.forEach(function(neighborhood) {
+                var option = document.createElement('option');
+                option.value = neighborhood;
+                option.textContent = neighborhood;
+                neighborhoodFilter.appendChild(option);
+            });
+
+            initializeFacets();
+            ['dataset-filter', 'cuisine-filter', 'neighborhood-filter'].forEach(function(id) {
+                document.getElementById(id).addEventListener('change', updateFacetCounts);
+            });
+
+            // Parse the grid cell keys once for viewport lookups
+            gridCells = Object.keys(restaurantsGrid.cells).map(function(key) {
+                var parts = key.split(',');
+                return {row: +parts[0], col: +parts[1], ids: restaurantsGrid.cells[key]};
+            });
+            gridBounds = {rowMin: Infinity, rowMax: -Infinity, colMin: Infinity, colMax: -Infinity};
+            gridCells.forEach(function(gridCell) {
+                gridBounds.rowMin = Math.min(gridBounds.rowMin, gridCell.row);
+                gridBounds.rowMax = Math.max(gridBounds.rowMax, gridCell.row);
+                gridBounds.colMin = Math.min(gridBounds.colMin, gridCell.col);
+                gridBounds.colMax = Math.max(gridBounds.colMax, gridCell.col);
+            });
+
+            markerIcon = L.icon({
+                iconUrl: 'https://raw.githubusercontent.com/pointhi/leaflet-color-markers/master/img/marker-icon-2x-blue.png',
+                shadowUrl: 'https://cdnjs.cloudflare.com/ajax/libs/leaflet/0.7.7/images/marker-shadow.png',
+                iconSize: [25, 41],
+                iconAnchor: [12, 41],
+                popupAnchor: [1, -34],
+                shadowSize: [41, 41]
+            });
+
+            // Show markers for whatever is on screen, and refresh them after every pan/zoom
+            map.on('moveend', renderVisibleMarkers);
+            createMarkers(restaurantsData);
+
+            // Adjust map padding on mobile to account for bottom panel
+            if (window.innerWidth <= 768) {
+                setTimeout(function() {
+                    map.invalidateSize();
+                }, 100);
             }
-            
-            function createMarkers(data) {
-                // Clear existing markers
-                markers.forEach(function(marker) {
-                    map.removeLayer(marker);
+        }
+
+        function tooltipContent(restaurant) {
+            return '<div style="font-family: Arial; font-size: 12px;">' +
+                '<strong>' + restaurant.name + '</strong><br>' +
+                '<em>Cuisine:</em> ' + restaurant.cuisine + '<br>' +
+                '<em>Address:</em> ' + restaurant.address +
+                '</div>';
+        }
+
+        function createMarker(restaurant) {
+            // Tooltip HTML is only built the first time the marker is hovered
+            return L.marker([restaurant.lat, restaurant.lon], {icon: markerIcon})
+                .bindTooltip(function() { return tooltipContent(restaurant); }, {
+                    permanent: false,
+                    direction: 'top',
+                    opacity: 0.9
                 });
-                markers = [];
-                
-                // Create new markers
-                data.forEach(function(restaurant) {
-                    var tooltipContent = 
-                        '<div style="font-family: Arial; font-size: 12px;">' +
-                        '<strong>' + restaurant.name + '</strong><br>' +
-                        '<em>Cuisine:</em> ' + restaurant.cuisine + '<br>' +
-                        '<em>Address:</em> ' + restaurant.address +
-                        '</div>';
-                    
-                    var marker = L.marker([restaurant.lat, restaurant.lon], {
-                        icon: L.icon({
-                            iconUrl: 'https://raw.githubusercontent.com/pointhi/leaflet-color-markers/master/img/marker-icon-2x-blue.png',
-                            shadowUrl: 'https://cdnjs.cloudflare.com/ajax/libs/leaflet/0.7.7/images/marker-shadow.png',
-                            iconSize: [25, 41],
-                            iconAnchor: [12, 41],
-                            popupAnchor: [1, -34],
-                            shadowSize: [41, 41]
-                        })
-                    })
-                    .bindTooltip(tooltipContent, {
-                        permanent: false,
-                        direction: 'top',
-                        opacity: 0.9
-                    })
-                    .addTo(map);
-                    
-                    markers.push(marker);
+        }
+
+        function visibleIds() {
+            // Ids of active restaurants inside the viewport plus a 25% margin, found through
+            // the grid so only nearby cells are checked
+            var bounds = map.getBounds().pad(0.25);
+            var origin = restaurantsGrid.origin;
+            var cell = restaurantsGrid.cell;
+            var rowMin = Math.floor((bounds.getSouth() - origin[0]) / cell[0]);
+            var rowMax = Math.floor((bounds.getNorth() - origin[0]) / cell[0]);
+            var colMin = Math.floor((bounds.getWest() - origin[1]) / cell[1]);
+            var colMax = Math.floor((bounds.getEast() - origin[1]) / cell[1]);
+
+            var ids = [];
+            function collect(cellIds) {
+                cellIds.forEach(function(id) {
+                    var restaurant = restaurantsData[id];
+                    if (activeIds.has(id) && bounds.contains([restaurant.lat, restaurant.lon])) {
+                        ids.push(id);
+                    }
                 });
-                
-                // Update count
-                document.getElementById('restaurant-count').textContent = data.length;
             }
-            
-            function applyFilters() {
-                var cuisineFilter = document.getElementById('cuisine-filter').value;
-                var searchText = document.getElementById('search-input').value.toLowerCase();
-                
-                var filteredData = restaurantsData.filter(function(restaurant) {
-                    var cuisineMatch = (cuisineFilter === 'all' || restaurant.cuisine === cuisineFilter);
-                    var searchMatch = (searchText === '' || restaurant.name.toLowerCase().includes(searchText));
-                    return cuisineMatch && searchMatch;
+
+            if ((rowMax - rowMin + 1) * (colMax - colMin + 1) > gridCells.length) {
+                // Zoomed far out: cheaper to check each occupied cell than every cell in view
+                gridCells.forEach(function(gridCell) {
+                    if (gridCell.row >= rowMin && gridCell.row <= rowMax &&
+                        gridCell.col >= colMin && gridCell.col <= colMax) {
+                        collect(gridCell.ids);
+                    }
                 });
-                
-                createMarkers(filteredData);
-                
-                // Fit map to filtered markers if any exist
-                if (filteredData.length > 0) {
-                    var bounds = L.latLngBounds(filteredData.map(r => [r.lat, r.lon]));
-                    // Add extra padding on mobile to account for bottom panel
-                    var padding = window.innerWidth <= 768 ? [50, 200] : [50, 50];
-                    map.fitBounds(bounds, {padding: padding});
+            } else {
+                for (var row = rowMin; row <= rowMax; row++) {
+                    for (var col = colMin; col <= colMax; col++) {
+                        var cellIds = restaurantsGrid.cells[row + ',' + col];
+                        if (cellIds) collect(cellIds);
+                    }
                 }
             }
-            
-            function resetFilters() {
-                document.getElementById('cuisine-filter').value = 'all';
-                document.getElementById('search-input').value = '';
-                createMarkers(restaurantsData);
-                
-                // Reset map view
-                var allBounds = L.latLngBounds(restaurantsData.map(r => [r.lat, r.lon]));
+            return ids;
+        }
+
+        function renderVisibleMarkers() {
+            var keep = {};
+            visibleIds().forEach(function(id) {
+                keep[id] = markers[id] || createMarker(restaurantsData[id]).addTo(map);
+            });
+
+            // Drop markers that scrolled out of view or no longer match the filters
+            Object.keys(markers).forEach(function(id) {
+                if (!keep[id]) {
+                    map.removeLayer(markers[id]);
+                }
+            });
+            markers = keep;
+        }
+
+        function createMarkers(data) {
+            activeIds = new Set(data.map(function(restaurant) { return restaurant.id; }));
+            renderVisibleMarkers();
+
+            // Update count
+            document.getElementById('restaurant-count').textContent = data.length;
+        }
+
+        function initializeFacets() {
+            // Sum each cube's rows and columns once, so every option count is a single lookup
+            var cuisineCount = facets.cuisines.length;
+            var neighborhoodCount = facets.neighborhoods.length;
+            Object.keys(facets.counts).forEach(function(key) {
+                var cube = Int32Array.from(facets.counts[key]);
+                var cuisineTotals = new Int32Array(cuisineCount);
+                var neighborhoodTotals = new Int32Array(neighborhoodCount);
+                var total = 0;
+                for (var c = 0; c < cuisineCount; c++) {
+                    for (var n = 0; n < neighborhoodCount; n++) {
+                        var count = cube[c * neighborhoodCount + n];
+                        cuisineTotals[c] += count;
+                        neighborhoodTotals[n] += count;
+                        total += count;
+                    }
+                }
+                facetCubes[key] = {
+                    cube: cube, cuisineTotals: cuisineTotals,
+                    neighborhoodTotals: neighborhoodTotals, total: total
+                };
+            });
+            updateFacetCounts();
+        }
+
+        function updateFacetCounts() {
+            // Label each option with how many restaurants it would show given the other filters
+            var facet = facetCubes[document.getElementById('dataset-filter').value];
+            var cuisineSelect = document.getElementById('cuisine-filter');
+            var neighborhoodSelect = document.getElementById('neighborhood-filter');
+            // Option 0 is "All ...", so option i + 1 is cuisine/neighborhood i
+            var c = cuisineSelect.selectedIndex - 1;
+            var n = neighborhoodSelect.selectedIndex - 1;
+            var neighborhoodCount = facets.neighborhoods.length;
+
+            facets.cuisines.forEach(function(cuisine, i) {
+                var count = n < 0 ? facet.cuisineTotals[i] : facet.cube[i * neighborhoodCount + n];
+                cuisineSelect.options[i + 1].textContent = cuisine + ' (' + count + ')';
+            });
+            facets.neighborhoods.forEach(function(neighborhood, i) {
+                var count = c < 0 ? facet.neighborhoodTotals[i] : facet.cube[c * neighborhoodCount + i];
+                neighborhoodSelect.options[i + 1].textContent = neighborhood + ' (' + count + ')';
+            });
+            cuisineSelect.options[0].textContent =
+                'All Cuisines (' + (n < 0 ? facet.total : facet.neighborhoodTotals[n]) + ')';
+            neighborhoodSelect.options[0].textContent =
+                'All Neighborhoods (' + (c < 0 ? facet.total : facet.cuisineTotals[c]) + ')';
+        }
+
+        function currentFilter() {
+            var datasetFilter = document.getElementById('dataset-filter').value;
+            var cuisineFilter = document.getElementById('cuisine-filter').value;
+            var neighborhoodFilter = document.getElementById('neighborhood-filter').value;
+            var searchText = document.getElementById('search-input').value.toLowerCase();
+
+            return function(restaurant) {
+                var datasetMatch = (datasetFilter === 'all' || datasetSets[datasetFilter].has(restaurant.id));
+                var cuisineMatch = (cuisineFilter === 'all' || restaurant.cuisine === cuisineFilter);
+                var neighborhoodMatch = (neighborhoodFilter === 'all' || restaurant.neighborhood === neighborhoodFilter);
+                var searchMatch = (searchText === '' || restaurant.name.toLowerCase().includes(searchText));
+                return datasetMatch && cuisineMatch && neighborhoodMatch && searchMatch;
+            };
+        }
+
+        function applyFilters() {
+            var filteredData = restaurantsData.filter(currentFilter());
+
+            createMarkers(filteredData);
+
+            // Fit map to filtered markers if any exist
+            if (filteredData.length > 0) {
+                var bounds = L.latLngBounds(filteredData.map(r => [r.lat, r.lon]));
+                // Add extra padding on mobile to account for bottom panel
                 var padding = window.innerWidth <= 768 ? [50, 200] : [50, 50];
-                map.fitBounds(allBounds, {padding: padding});
+                map.fitBounds(bounds, {padding: padding});
+            }
+        }
+
+        function resetFilters() {
+            document.getElementById('dataset-filter').value = 'all';
+            document.getElementById('cuisine-filter').value = 'all';
+            document.getElementById('neighborhood-filter').value = 'all';
+            document.getElementById('search-input').value = '';
+            updateFacetCounts();
+            createMarkers(restaurantsData);
+
+            if (userMarker) {
+                map.removeLayer(userMarker);
+                userMarker = null;
+            }
+
+            // Reset map view
+            var allBounds = L.latLngBounds(restaurantsData.map(r => [r.lat, r.lon]));
+            var padding = window.innerWidth <= 768 ? [50, 200] : [50, 50];
+            map.fitBounds(allBounds, {padding: padding});
+        }
+
+        function haversineMeters(lat1, lon1, lat2, lon2) {
+            var toRad = Math.PI / 180;
+            var dLat = (lat2 - lat1) * toRad;
+            var dLon = (lon2 - lon1) * toRad;
+            var a = Math.sin(dLat / 2) * Math.sin(dLat / 2) +
+                    Math.cos(lat1 * toRad) * Math.cos(lat2 * toRad) *
+                    Math.sin(dLon / 2) * Math.sin(dLon / 2);
+            return 2 * 6371008.8 * Math.asin(Math.min(1, Math.sqrt(a)));
+        }
+
+        function findNearest(lat, lon, k, candidates) {
+            // Search rings of grid cells outward from the user's cell, stopping once the
+            // next ring can't hold anything closer than the k-th match found so far, or once
+            // rings are past nearMeMaxMeters. Returns null if the user is that far from every
+            // restaurant's cell.
+            var row = Math.floor((lat - restaurantsGrid.origin[0]) / restaurantsGrid.cell[0]);
+            var col = Math.floor((lon - restaurantsGrid.origin[1]) / restaurantsGrid.cell[1]);
+            var cellMeters = restaurantsGrid.cellMeters;
+
+            // Rings needed to reach the nearest and the farthest occupied cell
+            var rowGap = Math.max(gridBounds.rowMin - row, row - gridBounds.rowMax, 0);
+            var colGap = Math.max(gridBounds.colMin - col, col - gridBounds.colMax, 0);
+            if ((Math.max(rowGap, colGap) - 1) * cellMeters > nearMeMaxMeters) {
+                return null;
             }
-            
-            // Allow Enter key to apply filters
-            document.addEventListener('DOMContentLoaded', function() {
-                document.getElementById('search-input').addEventListener('keypress', function(e) {
-                    if (e.key === 'Enter') {
-                        applyFilters();
+            var maxRing = Math.min(
+                Math.max(Math.abs(row - gridBounds.rowMin), Math.abs(row - gridBounds.rowMax),
+                         Math.abs(col - gridBounds.colMin), Math.abs(col - gridBounds.colMax)),
+                Math.ceil(nearMeMaxMeters / cellMeters) + 1
+            );
+
+            var found = [];
+            function visit(r, c) {
+                var ids = restaurantsGrid.cells[r + ',' + c];
+                if (!ids) return;
+                ids.forEach(function(i) {
+                    var restaurant = restaurantsData[i];
+                    if (candidates && !candidates(restaurant)) return;
+                    var distance = haversineMeters(lat, lon, restaurant.lat, restaurant.lon);
+                    if (distance <= nearMeMaxMeters) {
+                        found.push({restaurant: restaurant, distance: distance});
                     }
                 });
+            }
+
+            for (var ring = 0; ring <= maxRing; ring++) {
+                // Only the cells on this ring's edge: top and bottom rows, then the sides
+                if (ring === 0) {
+                    visit(row, col);
+                } else {
+                    for (var c = col - ring; c <= col + ring; c++) {
+                        visit(row - ring, c);
+                        visit(row + ring, c);
+                    }
+                    for (var r = row - ring + 1; r <= row + ring - 1; r++) {
+                        visit(r, col - ring);
+                        visit(r, col + ring);
+                    }
+                }
+                found.sort(function(a, b) { return a.distance - b.distance; });
+                if (found.length >= k && found[k - 1].distance <= ring * cellMeters) {
+                    break;
+                }
+            }
+            return found.slice(0, k);
+        }
+
+        function nearMe() {
+            if (!navigator.geolocation) {
+                alert('Location is not available in this browser.');
+                return;
+            }
+            navigator.geolocation.getCurrentPosition(function(position) {
+                var lat = position.coords.latitude;
+                var lon = position.coords.longitude;
+                var nearest = findNearest(lat, lon, 10, currentFilter());
+                if (nearest === null) {
+                    alert('You are more than ' + (nearMeMaxMeters / 1000) + ' km from every restaurant on this map.');
+                    return;
+                }
+                if (nearest.length === 0) {
+                    alert('No matching restaurants within ' + (nearMeMaxMeters / 1000) + ' km of you.');
+                    return;
+                }
+
+                createMarkers(nearest.map(function(match) { return match.restaurant; }));
+
+                if (userMarker) {
+                    map.removeLayer(userMarker);
+                }
+                userMarker = L.circleMarker([lat, lon], {
+                    radius: 8, color: '#4CAF50', fillColor: '#4CAF50', fillOpacity: 0.8
+                }).bindTooltip('You are here').addTo(map);
+
+                var points = nearest.map(function(match) { return [match.restaurant.lat, match.restaurant.lon]; });
+                points.push([lat, lon]);
+                var padding = window.innerWidth <= 768 ? [50, 200] : [50, 50];
+                map.fitBounds(L.latLngBounds(points), {padding: padding});
+            }, function() {
+                alert('Could not get your location.');
             });
-            
-            // Handle window resize
-            window.addEventListener('resize', function() {
-                setTimeout(function() {
-                    map.invalidateSize();
-                }, 100);
-                
-                // Reinitialize swipe on mobile
-                if (window.innerWidth <= 768) {
-                    initializeSwipe();
+        }
+
+        // Allow Enter key to apply filters
+        document.addEventListener('DOMContentLoaded', function() {
+            document.getElementById('search-input').addEventListener('keypress', function(e) {
+                if (e.key === 'Enter') {
+                    applyFilters();
                 }
             });
-        </script>
-    </body>
-    </html>
-    {% endmacro %}
+        });
+
+        // Handle window resize
+        window.addEventListener('resize', function() {
+            setTimeout(function() {
+                map.invalidateSize();
+            }, 100);
+
+            // Reinitialize swipe on mobile
+            if (window.innerWidth <= 768) {
+                initializeSwipe();
+            }
+        });
+    </script>
+</body>
+</html>
+{% endmacro %}
+"""
+
+
+class FilterPanel(MacroElement):
+    """
+    The filter panel, swipe handling and marker logic. The template is compiled once at import
+    rather than on every map build.
+    """
+    _template = Template(PANEL_TEMPLATE)
+
+    def __init__(self, map_name):
+        super().__init__()
+        self._name = 'FilterPanel'
+        self.map_name = map_name
+
+def normalize_name(name):
+    # Restaurant name with case, spaces and punctuation stripped, for matching across datasets
+    return re.sub(r'[^a-z0-9]+', '', str(name).lower())
+
+
+def _prepare_dataset(path, label):
+    print(f"\nReading {path}...")
+    part = pd.read_csv(path)
+    
+    # Remove rows without coordinates
+    part = part.dropna(subset=['Latitude', 'Longitude']).reset_index(drop=True)
+    part['Dataset'] = label
+    print(f"✓ Loaded {len(part)} restaurants with coordinates ({label})")
+    
+    # Fill missing values
+    part['Cuisine'] = part['Cuisine'].fillna('Unknown')
+    part['Restaurant'] = part['Restaurant'].fillna('Unknown')
+    part['Address'] = part['Address'].fillna('Address not available')
+    
+    # Prefer the polygon-assigned neighborhood from assign_neighborhoods.py when it's there
+    neighborhoods = part['Neighborhood'].astype(str).str.replace(r',\s*New York,\s*NY$', '', regex=True)
+    if 'Official Neighborhood' in part:
+        neighborhoods = part['Official Neighborhood'].where(part['Official Neighborhood'].notna(), neighborhoods)
+    part['Neighborhood'] = neighborhoods.replace('nan', 'Unknown').fillna('Unknown')
+    return part
+
+
+def _find_match(index, name, lat, lon, place_id):
+    """
+    Position of an already-kept restaurant this row is a listing of, or None. Rows match on
+    Google place id, or on normalized name within MATCH_METERS unless both have different
+    place ids (so a Place ID dataset still lines up with plain geocoded CSVs).
+    """
+    if place_id is not None and place_id in index['places']:
+        return index['places'][place_id]
+    for pos in index['names'].get(name, ()):
+        other_lat, other_lon, other_place_id = index['rows'][pos]
+        if place_id is not None and other_place_id is not None:
+            continue
+        if haversine_m(lat, lon, other_lat, other_lon) <= MATCH_METERS:
+            return pos
+    return None
+
+
+def _merge_dataset(state, part, label):
+    # Add one prepared dataset to the merged state, looking only at its own rows
+    index = state['index']
+    ids = set()
+    keep = []
+    place_ids = part['Place ID'] if 'Place ID' in part else [None] * len(part)
+    
+    for name, lat, lon, place_id in zip(part['Restaurant'], part['Latitude'], part['Longitude'], place_ids):
+        name = normalize_name(name)
+        place_id = None if pd.isna(place_id) else str(place_id)
+        pos = _find_match(index, name, lat, lon, place_id)
+        is_new = pos is None
+        if is_new:
+            pos = len(index['rows'])
+            index['rows'].append((lat, lon, place_id))
+            index['names'].setdefault(name, []).append(pos)
+            if place_id is not None:
+                index['places'][place_id] = pos
+        elif place_id is not None and index['rows'][pos][2] is None:
+            # Matched by name; remember the place id so later listings can match on it
+            kept_lat, kept_lon, _ = index['rows'][pos]
+            index['rows'][pos] = (kept_lat, kept_lon, place_id)
+            index['places'][place_id] = pos
+        keep.append(is_new)
+        ids.add(pos)
+    
+    new_rows = part[keep]
+    state['frames'].append(new_rows)
+    state['size'] += len(new_rows)
+    state['dataset_ids'][label] = ids
+
+
+def _cache_file(cache_dir, signatures):
+    # <which files, in order>_<their sizes/mtimes and the matching rules>, so an out-of-date
+    # merge of the same files can be told apart from a merge of different files
+    datasets = hashlib.sha1(json.dumps([sig[:2] for sig in signatures]).encode()).hexdigest()[:16]
+    contents = hashlib.sha1(json.dumps([CACHE_VERSION, MATCH_METERS, signatures]).encode()).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{datasets}_{contents}.pkl")
+
+
+def _prune_cache(cache_dir, signatures):
+    # Delete cached merges of these datasets (or a leading run of them) that are out of date;
+    # merges of other dataset lists are left alone
+    current = {os.path.basename(_cache_file(cache_dir, signatures[:n])) for n in range(1, len(signatures) + 1)}
+    datasets = {name.split('_')[0] for name in current}
+    for name in os.listdir(cache_dir):
+        if name.endswith('.pkl') and name.split('_')[0] in datasets and name not in current:
+            os.remove(os.path.join(cache_dir, name))
+
+
+def load_datasets(csv_file, cache_dir='.map_cache'):
     """
+    Read one CSV, or a {label: csv_file} dict of season/city datasets, into a single deduplicated
+    DataFrame. Returns the DataFrame and {label: [row positions]} for each dataset.
     
-    # Add the custom template to the map
-    macro = MacroElement()
-    macro._template = Template(template)
-    m.get_root().add_child(macro)
+    The merged result is cached in cache_dir keyed on each file's path, size and modification
+    time. Adding a dataset to the end of the dict reuses the cached merge of the ones before it,
+    so only the new rows are read and matched; merges made out of date by a changed file are
+    deleted. Pass cache_dir=None to always rebuild.
+    
+    A single dataset is read as-is: nothing is merged, deduplicated or cached.
+    """
+    if isinstance(csv_file, dict):
+        datasets = csv_file
+    else:
+        datasets = {os.path.splitext(os.path.basename(csv_file))[0]: csv_file}
     
-    # Save the map
+    if len(datasets) == 1:
+        label, path = next(iter(datasets.items()))
+        df = _prepare_dataset(path, label)
+        return df, {label: list(range(len(df)))}
+    
+    signatures = []
+    for label, path in datasets.items():
+        stat = os.stat(path)
+        signatures.append([label, os.path.abspath(path), stat.st_size, stat.st_mtime_ns])
+    
+    # Start from the longest run of leading datasets that's already been merged
+    state = None
+    cached = 0
+    if cache_dir:
+        for n in range(len(signatures), 0, -1):
+            cache_file = _cache_file(cache_dir, signatures[:n])
+            if os.path.exists(cache_file):
+                with open(cache_file, 'rb') as f:
+                    state = pickle.load(f)
+                cached = n
+                print(f"✓ Reused cached merge of {n} dataset(s)")
+                break
+    if state is None:
+        state = {'frames': [], 'size': 0, 'dataset_ids': {},
+                 'index': {'rows': [], 'names': {}, 'places': {}}}
+    
+    # Keep the first listing of each restaurant (datasets earlier in the dict win)
+    for label, path in list(datasets.items())[cached:]:
+        _merge_dataset(state, _prepare_dataset(path, label), label)
+    
+    if len(state['frames']) > 1:
+        state['frames'] = [pd.concat(state['frames'], ignore_index=True)]
+    
+    if cache_dir and cached < len(signatures):
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(_cache_file(cache_dir, signatures), 'wb') as f:
+            pickle.dump(state, f)
+        _prune_cache(cache_dir, signatures)
+    
+    df = state['frames'][0].reset_index(drop=True)
+    dataset_ids = {label: sorted(state['dataset_ids'][label]) for label in datasets}
+    
+    total = sum(len(ids) for ids in dataset_ids.values())
+    print(f"✓ Merged {total} restaurant listings into {len(df)} unique restaurants")
+    
+    return df, dataset_ids
+
+
+def build_facets(df, dataset_ids):
+    """
+    Precompute cuisine x neighborhood restaurant counts so the panel can show facet counts with
+    a single array lookup. Each count cube is a flat list where cuisine c and neighborhood n
+    live at c * len(neighborhoods) + n. The cube for all restaurants is keyed 'all' and each
+    dataset's cube by its position ('0', '1', ...), matching the season/city dropdown's values, so
+    a dataset's label never collides with 'all'.
+    """
+    cuisine_codes, cuisines = pd.factorize(df['Cuisine'], sort=True)
+    neighborhood_codes, neighborhoods = pd.factorize(df['Neighborhood'], sort=True)
+    cells = cuisine_codes * len(neighborhoods) + neighborhood_codes
+    size = len(cuisines) * len(neighborhoods)
+    
+    counts = {'all': np.bincount(cells, minlength=size).tolist()}
+    for i, ids in enumerate(dataset_ids.values()):
+        counts[str(i)] = np.bincount(cells[ids], minlength=size).tolist()
+    
+    return {'cuisines': list(cuisines), 'neighborhoods': list(neighborhoods), 'counts': counts}
+
+
+def restaurant_records(df):
+    """
+    Yield the per-restaurant dicts the panel's JavaScript reads, one at a time.
+    """
+    columns = zip(df.index, df['Restaurant'], df['Cuisine'], df['Neighborhood'], df['Address'],
+                  df['Latitude'], df['Longitude'])
+    for idx, name, cuisine, neighborhood, address, lat, lon in columns:
+        yield {
+            'id': int(idx),
+            'name': name,
+            'cuisine': cuisine,
+            'neighborhood': neighborhood,
+            'address': address,
+            'lat': float(lat),
+            'lon': float(lon)
+        }
+
+
+def _script_safe(text):
+    # Keep a restaurant name containing "</script>" from ending the page's script block
+    return text.replace('</', '<\\/')
+
+
+def write_map(m, output_file, records, extras):
+    """
+    Save the map with the panel's data written straight to the file in CHUNK_SIZE pieces.
+    
+    folium renders the page around a small placeholder; the JSON for records (an iterable of
+    dicts) and extras (name -> JSON-friendly value) then goes out record by record, so the full
+    payload never exists as one string.
+    """
+    html = m.get_root().render()
+    if html.count(PANEL_DATA_PLACEHOLDER) != 1:
+        raise ValueError("Rendered map should contain exactly one panel data placeholder")
+    head, tail = html.split(PANEL_DATA_PLACEHOLDER)
+    
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write(head)
+        
+        buffer = ['{"restaurants": [']
+        size = 0
+        for i, record in enumerate(records):
+            piece = (',' if i else '') + _script_safe(json.dumps(record))
+            buffer.append(piece)
+            size += len(piece)
+            if size >= CHUNK_SIZE:
+                f.write(''.join(buffer))
+                buffer = []
+                size = 0
+        buffer.append(']')
+        for name, value in extras.items():
+            buffer.append(f', {json.dumps(name)}: {_script_safe(json.dumps(value))}')
+        buffer.append('}')
+        f.write(''.join(buffer))
+        
+        f.write(tail)
+    
+    return output_file
+
+
+def create_advanced_map(csv_file='filename', output_file='<filename>.html', run=None):
+    """
+    Create an advanced interactive map with swipeable bottom panel on mobile.
+    
+    csv_file can be a single CSV or a {label: csv_file} dict (e.g. {'Winter 2026': ...,
+    'Summer 2026': ...}) to merge several seasons/cities into one map with a filter for each.
+    
+    Stage timings go to run (a PipelineRun); a new one is started if none is given.
+    """
+    
+    if run is None:
+        with PipelineRun('create_map') as run:
+            return create_advanced_map(csv_file, output_file, run=run)
+    
+    print("=" * 80)
+    print("Creating Advanced Interactive Restaurant Map (Swipeable Bottom Panel)")
+    print("=" * 80)
+    
+    with run.span('load datasets'):
+        df, dataset_ids = load_datasets(csv_file)
+    run.count('rows processed', len(df))
+    
+    # Get unique cuisines
+    cuisines = sorted(df['Cuisine'].unique())
+    print(f"✓ Found {len(cuisines)} unique cuisines")
+    
+    # Create the base map
+    print("\nCreating map...")
+    center_lat = df['Latitude'].mean()
+    center_lon = df['Longitude'].mean()
+    
+    m = folium.Map(
+        location=[center_lat, center_lon],
+        zoom_start=12,
+        tiles='CartoDB positron'
+    )
+    
+    # Precompute the spatial grid for the "Near Me" button
+    with run.span('build grid'):
+        grid = build_grid(df['Latitude'], df['Longitude'])
+    
+    # Cuisine x neighborhood counts for the facet counts in the dropdowns
+    with run.span('build facets'):
+        facets = build_facets(df, dataset_ids)
+    
+    # Add the custom panel to the map
+    m.get_root().add_child(FilterPanel(m.get_name()))
+    
+    # Save the map, streaming the restaurant data into the page rather than building it in memory
     print(f"\nSaving map to {output_file}...")
-    m.save(output_file)
+    with run.span('save map'):
+        write_map(m, output_file, restaurant_records(df), {
+            'grid': grid,
+            # Restaurant ids in each season/city dataset, for the dataset filter
+            'datasets': [{'label': label, 'ids': ids} for label, ids in dataset_ids.items()],
+            'facets': facets,
+        })
     
     # Summary
     print("\n" + "=" * 80)
     print("Summary")
     print("=" * 80)
     print(f"Restaurants mapped: {len(df)}")
+    if len(dataset_ids) > 1:
+        for label, ids in dataset_ids.items():
+            print(f"  - {label}: {len(ids)} restaurants")
     print(f"Cuisine types: {len(cuisines)}")
+    print(f"Neighborhoods: {len(facets['neighborhoods'])}")
     
     print(f"\nTop 10 cuisines:")
     cuisine_counts = df['Cuisine'].value_counts()
@@ -543,6 +1107,7 @@ def create_advanced_map(csv_file='filename', output_file='<filename>.html'):
     print("✓ SWIPE UP on drag handle to expand panel")
     print("✓ TAP drag handle to toggle panel")
     print("✓ When collapsed, only shows header bar")
+    print("✓ NEAR ME button shows the 10 closest restaurants")
     print("✓ Smooth animations for collapsing/expanding")
     
     return output_file